@@ -17,7 +17,7 @@ from utils.storage import (
     create_signed_url_for_path,
     remove_storage_paths
 )
-from utils.extraction import extract_and_store_texts
+from utils.extraction import extract_and_store_texts, invalidate_document_text_cache
 from utils.analysis import run_full_analysis_background, call_ml
 from utils.dossier import generate_and_upload_dossier
 from utils.cleanup import delete_user_data_on_logout
@@ -151,13 +151,15 @@ async def upload_document(
         if not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
         
-        # Check file size (max 10MB)
-        content = await file.read()
-        if len(content) > 10 * 1024 * 1024:
+        # Check file size (max 10MB) without reading the upload into memory
+        if file.size is not None:
+            size = file.size
+        else:
+            size = file.file.seek(0, os.SEEK_END)
+            await file.seek(0)  # Reset file pointer
+        if size > 10 * 1024 * 1024:
             raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
         
-        await file.seek(0)  # Reset file pointer
-        
         # Upload to storage
         document_id, storage_path = await upload_document_to_supabase(file, user_id)
         
@@ -255,6 +257,7 @@ def delete_document(document_id: str, Authorization: str = Header(None)):
         
         # Delete related data (cascading)
         supabase.table("extracted_texts").delete().eq("document_id", document_id).execute()
+        invalidate_document_text_cache(document_id)
         supabase.table("analyses").delete().eq("document_id", document_id).execute()
         supabase.table("dossiers").delete().eq("document_id", document_id).execute()
         
@@ -0,0 +1,40 @@
+"""
+Shared Supabase client for IRIS
+One client per process, backed by a keep-alive HTTP connection pool
+"""
+
+import os
+from functools import lru_cache
+import httpx
+from dotenv import load_dotenv
+from supabase import create_client, Client, ClientOptions
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+# Idle connections are kept long enough to span a whole dossier generation
+HTTP_KEEPALIVE_EXPIRY = 120
+HTTP_TIMEOUT = 120
+
+@lru_cache(maxsize=1)
+def get_supabase() -> Client:
+    """
+    Get the process-wide Supabase client (service role)
+    
+    All PostgREST and Storage calls share one httpx.Client, so repeated
+    queries reuse open TLS connections instead of reconnecting each time.
+    
+    Returns:
+        Supabase client
+    """
+    http_client = httpx.Client(
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(keepalive_expiry=HTTP_KEEPALIVE_EXPIRY)
+    )
+    return create_client(
+        SUPABASE_URL,
+        SERVICE_KEY,
+        options=ClientOptions(httpx_client=http_client)
+    )
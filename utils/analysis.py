@@ -7,10 +7,12 @@ Supports multiple endpoints: /predict, /compliance, /crossverify
 import os
 import requests
 import base64
+import hashlib
 from typing import Dict, Optional, List
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from .extraction import extract_and_store_texts, get_document_full_text
+from supabase import Client
+from ._supabase import get_supabase
+from .extraction import extract_and_store_texts, get_document_full_text, invalidate_document_text_cache
 from .parser import parse_credit_fields, validate_parsed_fields
 from .storage import upload_bytes_to_storage
 
@@ -20,7 +22,7 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 ML_BASE_URL = os.getenv("ML_BASE_URL", "http://localhost:5000")
 
-supabase: Client = create_client(SUPABASE_URL, SERVICE_KEY)
+supabase: Client = get_supabase()
 
 def call_ml(endpoint: str, payload: dict, timeout: int = 60) -> dict:
     """
@@ -254,7 +256,8 @@ def run_full_analysis_background(document_id: str, user_id: str, storage_path: s
                     "analysis_id": analysis_id,
                     "user_id": user_id,
                     "heatmap_path": heatmap_storage_path,
-                    "caption": "Credit Risk Analysis Heatmap"
+                    "caption": "Credit Risk Analysis Heatmap",
+                    "content_sha1": hashlib.sha1(heatmap_bytes).hexdigest()
                 }).execute()
                 
                 heatmap_path = heatmap_storage_path
@@ -409,6 +412,7 @@ def rerun_analysis(document_id: str, user_id: str) -> Dict:
     
     # Delete old extracted texts
     supabase.table("extracted_texts").delete().eq("document_id", document_id).execute()
+    invalidate_document_text_cache(document_id)
     
     # Run new analysis
     return run_full_analysis_background(document_id, user_id, storage_path)
\ No newline at end of file
@@ -6,14 +6,15 @@ Tracks all significant user actions
 import os
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+from ._supabase import get_supabase
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SERVICE_KEY)
+supabase: Client = get_supabase()
 
 def log_action(
     user_id: str,
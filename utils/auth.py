@@ -5,7 +5,8 @@ Handles JWT verification and user profile management
 
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+from ._supabase import get_supabase
 from typing import Optional, Dict
 
 load_dotenv()
@@ -18,7 +19,7 @@ ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 if not all([SUPABASE_URL, SERVICE_KEY]):
     raise RuntimeError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in environment")
 
-supabase: Client = create_client(SUPABASE_URL, SERVICE_KEY)
+supabase: Client = get_supabase()
 
 def verify_token(auth_header: Optional[str]) -> str:
     """
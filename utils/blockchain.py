@@ -8,7 +8,8 @@ import json
 import subprocess
 from typing import Tuple
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+from ._supabase import get_supabase
 
 load_dotenv()
 
@@ -18,7 +19,7 @@ HARDHAT_RPC_URL = os.getenv("HARDHAT_RPC_URL", "https://sepolia.infura.io/v3/YOU
 DEPLOYER_PRIVATE_KEY = os.getenv("DEPLOYER_PRIVATE_KEY", "")
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS", "")
 
-supabase: Client = create_client(SUPABASE_URL, SERVICE_KEY)
+supabase: Client = get_supabase()
 
 def anchor_dossier_on_chain(dossier_id: str, user_id: str) -> Tuple[str, str]:
     """
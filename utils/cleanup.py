@@ -6,16 +6,19 @@ Handles user data deletion based on remember_me preference
 import os
 from typing import List
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+from ._supabase import get_supabase
 from .auth import get_user_remember_me
 from .audit import log_action
+from .extraction import invalidate_document_text_cache
+from .storage import remove_storage_paths
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SERVICE_KEY)
+supabase: Client = get_supabase()
 
 def delete_user_data_on_logout(user_id: str) -> bool:
     """
@@ -56,32 +59,21 @@ def delete_user_data_on_logout(user_id: str) -> bool:
             dossier_paths.append(f"{user_id}/dossiers/{doc_id}_dossier.zip")
         
         # 4. Delete from storage buckets
-        if doc_paths:
-            try:
-                supabase.storage.from_("documents").remove(doc_paths)
-                print(f"[Cleanup] Deleted {len(doc_paths)} documents from storage")
-            except Exception as e:
-                print(f"[Cleanup] Warning: Failed to delete documents: {e}")
-        
-        if heatmap_paths:
-            try:
-                supabase.storage.from_("heatmaps").remove(heatmap_paths)
-                print(f"[Cleanup] Deleted {len(heatmap_paths)} heatmaps from storage")
-            except Exception as e:
-                print(f"[Cleanup] Warning: Failed to delete heatmaps: {e}")
-        
-        if dossier_paths:
-            try:
-                supabase.storage.from_("dossiers").remove(dossier_paths)
-                print(f"[Cleanup] Deleted {len(dossier_paths)} dossiers from storage")
-            except Exception as e:
-                print(f"[Cleanup] Warning: Failed to delete dossiers: {e}")
+        if doc_paths and remove_storage_paths("documents", doc_paths):
+            print(f"[Cleanup] Deleted {len(doc_paths)} documents from storage")
+        
+        if heatmap_paths and remove_storage_paths("heatmaps", heatmap_paths):
+            print(f"[Cleanup] Deleted {len(heatmap_paths)} heatmaps from storage")
+        
+        if dossier_paths and remove_storage_paths("dossiers", dossier_paths):
+            print(f"[Cleanup] Deleted {len(dossier_paths)} dossiers from storage")
         
         # 5. Delete database records (order matters due to foreign keys)
         # Note: Blockchain certificates are kept immutable as per spec
         
         # Delete extracted texts
         supabase.table("extracted_texts").delete().eq("user_id", user_id).execute()
+        invalidate_document_text_cache()
         print(f"[Cleanup] Deleted extracted_texts records")
         
         # Delete heatmaps
@@ -145,10 +137,7 @@ def delete_document_cascade(document_id: str, user_id: str) -> None:
     
     # Delete storage
     if storage_path:
-        try:
-            supabase.storage.from_("documents").remove([storage_path])
-        except Exception as e:
-            print(f"Warning: Failed to delete document from storage: {e}")
+        remove_storage_paths("documents", [storage_path])
     
     # Delete related heatmaps (get analysis_ids first)
     analyses = supabase.table("analyses").select("id").eq("document_id", document_id).execute()
@@ -158,11 +147,7 @@ def delete_document_cascade(document_id: str, user_id: str) -> None:
         heatmaps = supabase.table("heatmaps").select("heatmap_path").in_("analysis_id", analysis_ids).execute()
         heatmap_paths = [h["heatmap_path"] for h in heatmaps.data] if heatmaps.data else []
         
-        if heatmap_paths:
-            try:
-                supabase.storage.from_("heatmaps").remove(heatmap_paths)
-            except Exception as e:
-                print(f"Warning: Failed to delete heatmaps: {e}")
+        remove_storage_paths("heatmaps", heatmap_paths)
         
         supabase.table("heatmaps").delete().in_("analysis_id", analysis_ids).execute()
     
@@ -170,16 +155,14 @@ def delete_document_cascade(document_id: str, user_id: str) -> None:
     dossiers = supabase.table("dossiers").select("id").eq("document_id", document_id).execute()
     if dossiers.data:
         dossier_path = f"{user_id}/dossiers/{document_id}_dossier.zip"
-        try:
-            supabase.storage.from_("dossiers").remove([dossier_path])
-        except Exception as e:
-            print(f"Warning: Failed to delete dossier: {e}")
+        remove_storage_paths("dossiers", [dossier_path])
         
         # Note: Keep blockchain certificates (immutable)
         supabase.table("dossiers").delete().eq("document_id", document_id).execute()
     
     # Delete database records
     supabase.table("extracted_texts").delete().eq("document_id", document_id).execute()
+    invalidate_document_text_cache(document_id)
     supabase.table("analyses").delete().eq("document_id", document_id).execute()
     supabase.table("documents").delete().eq("id", document_id).execute()
     
@@ -3,45 +3,146 @@ Dossier generation utilities for IRIS
 Creates comprehensive ZIP packages with reports, certificates, and documents
 """
 
+import io
 import os
-import json
+import re
+import importlib.util
 import hashlib
+import orjson
 import zipfile
-import tempfile
-from typing import Tuple
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Tuple, Optional, Union, BinaryIO
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from .storage import create_signed_url_for_path, download_from_storage
+from .storage import (
+    create_signed_url_for_path,
+    download_from_storage,
+    upload_bytes_to_storage
+)
+from ._supabase import get_supabase
+
+# reportlab is imported lazily so that workers which import this module but
+# never build a dossier don't pay for it.
+
+# reportlab measures string widths in pure Python unless the rl_accel C
+# extension (installed via reportlab[accel]) is present
+if importlib.util.find_spec("_rl_accel") is None:
+    print("Warning: _rl_accel not installed; PDF generation will be slower")
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SERVICE_KEY)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S UTC'
 
-def create_risk_report_pdf(analysis_data: dict, output_path: str):
-    """Generate Credit Risk Analysis Report PDF"""
-    doc = SimpleDocTemplate(output_path, pagesize=letter)
-    story = []
-    styles = getSampleStyleSheet()
+# Concurrent storage downloads per dossier (original PDF + heatmaps)
+DOWNLOAD_WORKERS = 4
+
+# Archive folders holding already-compressed files (PDF uploads, PNG heatmaps);
+# these are stored as-is, everything else is deflated at level 1
+_STORED_PREFIXES = ("original_documents/", "visuals/")
+
+def __getattr__(name: str):
+    # Keep `from utils.dossier import supabase` working (PEP 562)
+    if name == "supabase":
+        return get_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Parsed credit fields shown in the risk report, in display order
+_FIELD_LABELS = (
+    ('age', 'Age'),
+    ('gender', 'Gender'),
+    ('job', 'Employment'),
+    ('housing', 'Housing Status'),
+    ('saving_accounts', 'Savings'),
+    ('checking_account', 'Checking Account'),
+    ('credit_amount', 'Credit Amount'),
+    ('duration', 'Loan Duration'),
+    ('purpose', 'Loan Purpose'),
+)
+
+# Per-field value formatters (fields not listed fall back to str)
+_FIELD_FORMATTERS = {
+    'credit_amount': lambda v: f"₹{v:,.2f}" if isinstance(v, (int, float)) else str(v),
+    'duration': lambda v: f"{v} months" if isinstance(v, int) else str(v),
+}
+
+@lru_cache(maxsize=1)
+def _styles():
+    """Sample stylesheet plus the custom paragraph styles used by the dossier PDFs"""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        'ReportTitle',
         parent=styles['Heading1'],
         fontSize=24,
         textColor=colors.HexColor('#1a1a1a'),
         spaceAfter=30,
         alignment=TA_CENTER
-    )
+    ))
+    styles.add(ParagraphStyle(
+        'CertificateTitle',
+        parent=styles['ReportTitle'],
+        fontSize=28
+    ))
+    styles.add(ParagraphStyle(
+        'RiskScore',
+        parent=styles['Normal'],
+        fontSize=16,
+        spaceAfter=15
+    ))
+    styles.add(ParagraphStyle(
+        'Score',
+        parent=styles['Normal'],
+        fontSize=16,
+        spaceAfter=20
+    ))
+    styles.add(ParagraphStyle(
+        'Certificate',
+        parent=styles['Normal'],
+        fontSize=12,
+        spaceAfter=15,
+        alignment=TA_CENTER
+    ))
+    styles.add(ParagraphStyle(
+        'Details',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=10
+    ))
+    return styles
+
+@lru_cache(maxsize=None)
+def _table_style(valign: str):
+    """Shared header/grid style for report tables, one instance per vertical alignment"""
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+    
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), valign),
+    ])
+
+def _append_risk_story(story: list, analysis_data: dict, styles, generated_at: datetime):
+    """Append the Credit Risk Analysis Report section to a report story"""
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Table, Paragraph, Spacer
+    
+    # Title
+    title_style = styles['ReportTitle']
     story.append(Paragraph("Credit Risk Analysis Report", title_style))
     story.append(Spacer(1, 0.3*inch))
     
@@ -49,12 +150,7 @@ def create_risk_report_pdf(analysis_data: dict, output_path: str):
     risk_data = analysis_data.get('risk', {})
     
     # Risk Score and Prediction
-    score_style = ParagraphStyle(
-        'Score',
-        parent=styles['Normal'],
-        fontSize=16,
-        spaceAfter=15
-    )
+    score_style = styles['RiskScore']
     
     risk_score = risk_data.get('risk_score', 0)
     prediction = risk_data.get('prediction', 0)
@@ -69,19 +165,25 @@ def create_risk_report_pdf(analysis_data: dict, output_path: str):
         f"<b>Credit Assessment:</b> <font color='{pred_color.hexval()}'><b>{pred_text}</b></font>",
         score_style
     ))
-    story.append(Paragraph(f"<b>Risk Score:</b> {risk_score:.1%}", score_style))
-    story.append(Paragraph(f"<b>Confidence:</b> {probability:.1%}", score_style))
-    story.append(Spacer(1, 0.3*inch))
+    story.extend((
+        Paragraph(f"<b>Risk Score:</b> {risk_score:.1%}", score_style),
+        Paragraph(f"<b>Confidence:</b> {probability:.1%}", score_style),
+        Spacer(1, 0.3*inch)
+    ))
     
     # Risk Factors
-    story.append(Paragraph("<b>Risk Factors Identified:</b>", styles['Heading2']))
-    story.append(Spacer(1, 0.1*inch))
+    story.extend((
+        Paragraph("<b>Risk Factors Identified:</b>", styles['Heading2']),
+        Spacer(1, 0.1*inch)
+    ))
     
     risk_factors = risk_data.get('risk_factors', [])
     if risk_factors:
-        for i, factor in enumerate(risk_factors, 1):
-            story.append(Paragraph(f"{i}. {factor}", styles['Normal']))
-            story.append(Spacer(1, 0.08*inch))
+        story.extend(
+            flowable
+            for i, factor in enumerate(risk_factors, 1)
+            for flowable in (Paragraph(f"{i}. {factor}", styles['Normal']), Spacer(1, 0.08*inch))
+        )
     else:
         story.append(Paragraph("No significant risk factors detected.", styles['Normal']))
     
@@ -96,38 +198,12 @@ def create_risk_report_pdf(analysis_data: dict, output_path: str):
         # Create table for parsed fields
         field_data = [['Field', 'Value']]
         
-        field_labels = {
-            'age': 'Age',
-            'gender': 'Gender',
-            'job': 'Employment',
-            'housing': 'Housing Status',
-            'saving_accounts': 'Savings',
-            'checking_account': 'Checking Account',
-            'credit_amount': 'Credit Amount',
-            'duration': 'Loan Duration',
-            'purpose': 'Loan Purpose'
-        }
-        
-        for field, label in field_labels.items():
+        for field, label in _FIELD_LABELS:
             value = parsed_fields.get(field, 'N/A')
-            if field == 'credit_amount' and value != 'N/A':
-                value = f"₹{value:,.2f}"
-            elif field == 'duration' and value != 'N/A':
-                value = f"{value} months"
-            field_data.append([label, str(value)])
+            field_data.append([label, _FIELD_FORMATTERS.get(field, str)(value)])
         
         table = Table(field_data, colWidths=[2.5*inch, 3.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        table.setStyle(_table_style('MIDDLE'))
         
         story.append(table)
         story.append(Spacer(1, 0.3*inch))
@@ -135,58 +211,68 @@ def create_risk_report_pdf(analysis_data: dict, output_path: str):
     # Validation warnings if any
     validation_errors = risk_data.get('validation_errors', [])
     if validation_errors:
-        story.append(Paragraph("<b>⚠️ Data Quality Warnings:</b>", styles['Heading2']))
-        story.append(Spacer(1, 0.1*inch))
-        for error in validation_errors:
-            story.append(Paragraph(f"• {error}", styles['Normal']))
-            story.append(Spacer(1, 0.08*inch))
+        story.extend((
+            Paragraph("<b>⚠️ Data Quality Warnings:</b>", styles['Heading2']),
+            Spacer(1, 0.1*inch)
+        ))
+        story.extend(
+            flowable
+            for error in validation_errors
+            for flowable in (Paragraph(f"• {error}", styles['Normal']), Spacer(1, 0.08*inch))
+        )
     
     # Timestamp
     story.append(Spacer(1, 0.4*inch))
     story.append(Paragraph(
-        f"<i>Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</i>",
+        f"<i>Generated on {generated_at.strftime(TIMESTAMP_FORMAT)}</i>",
         styles['Normal']
     ))
-    
-    doc.build(story)
 
-def create_compliance_report_pdf(analysis_data: dict, output_path: str):
-    """Generate Compliance Analysis Report PDF"""
-    doc = SimpleDocTemplate(output_path, pagesize=letter)
-    story = []
-    styles = getSampleStyleSheet()
+def _append_placeholder_story(story: list, title: str, message: str, styles, generated_at: datetime):
+    """Append a minimal title/note/timestamp section for an unavailable report"""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer
     
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph("Compliance Analysis Report", title_style))
+    title_style = styles['ReportTitle']
+    story.append(Paragraph(title, title_style))
     story.append(Spacer(1, 0.3*inch))
+    story.append(Paragraph(f"<b>Not yet available:</b> {message}", styles['Normal']))
+    
+    # Timestamp
+    story.append(Spacer(1, 0.4*inch))
+    story.append(Paragraph(
+        f"<i>Generated on {generated_at.strftime(TIMESTAMP_FORMAT)}</i>",
+        styles['Normal']
+    ))
+
+def _append_compliance_story(story: list, analysis_data: dict, styles, generated_at: datetime):
+    """Append the Compliance Analysis Report section to a report story"""
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Table, Paragraph, Spacer
     
     # Compliance data
     compliance_data = analysis_data.get('compliance', {})
     
-    # Check if compliance is available
+    # Nothing to lay out until the compliance endpoint is available
     status = compliance_data.get('status', 'unknown')
     if status == 'not_available':
-        story.append(Paragraph(
-            "<b>Note:</b> " + compliance_data.get('message', 'Compliance endpoint not yet available'),
-            styles['Normal']
-        ))
-        story.append(Spacer(1, 0.2*inch))
+        _append_placeholder_story(
+            story,
+            "Compliance Analysis Report",
+            compliance_data.get('message', 'Compliance endpoint not yet available'),
+            styles,
+            generated_at
+        )
+        return
+    
+    # Title
+    title_style = styles['ReportTitle']
+    story.append(Paragraph("Compliance Analysis Report", title_style))
+    story.append(Spacer(1, 0.3*inch))
     
     # Compliance Score
-    score_style = ParagraphStyle(
-        'Score',
-        parent=styles['Normal'],
-        fontSize=16,
-        spaceAfter=20
-    )
+    score_style = styles['Score']
     
     compliance_score = compliance_data.get('compliance_score', 0)
     story.append(Paragraph(f"<b>Compliance Score:</b> {compliance_score:.1%}", score_style))
@@ -218,17 +304,7 @@ def create_compliance_report_pdf(analysis_data: dict, output_path: str):
             ])
         
         table = Table(table_data, colWidths=[0.4*inch, 1.8*inch, 3.2*inch, 0.8*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
+        table.setStyle(_table_style('TOP'))
         
         story.append(table)
     else:
@@ -239,58 +315,51 @@ def create_compliance_report_pdf(analysis_data: dict, output_path: str):
     # Checks performed
     checks = compliance_data.get('checks_performed', [])
     if checks:
-        story.append(Paragraph(f"<b>Checks Performed ({len(checks)}):</b>", styles['Heading2']))
-        story.append(Spacer(1, 0.1*inch))
-        for check in checks:
-            story.append(Paragraph(f"✓ {check}", styles['Normal']))
-            story.append(Spacer(1, 0.05*inch))
+        story.extend((
+            Paragraph(f"<b>Checks Performed ({len(checks)}):</b>", styles['Heading2']),
+            Spacer(1, 0.1*inch)
+        ))
+        story.extend(
+            flowable
+            for check in checks
+            for flowable in (Paragraph(f"✓ {check}", styles['Normal']), Spacer(1, 0.05*inch))
+        )
     
     # Timestamp
     story.append(Spacer(1, 0.4*inch))
     story.append(Paragraph(
-        f"<i>Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</i>",
+        f"<i>Generated on {generated_at.strftime(TIMESTAMP_FORMAT)}</i>",
         styles['Normal']
     ))
-    
-    doc.build(story)
 
-def create_crossverify_report_pdf(analysis_data: dict, output_path: str):
-    """Generate Cross-Verification Report PDF"""
-    doc = SimpleDocTemplate(output_path, pagesize=letter)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph("Field Verification Report", title_style))
-    story.append(Spacer(1, 0.3*inch))
+def _append_crossverify_story(story: list, analysis_data: dict, styles, generated_at: datetime):
+    """Append the Cross-Verification Report section to a report story"""
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Table, Paragraph, Spacer
     
     # Cross-verify data
     crossverify_data = analysis_data.get('crossverify', {})
     
-    # Check if cross-verify is available
+    # Nothing to lay out until the cross-verify endpoint is available
     status = crossverify_data.get('status', 'unknown')
     if status == 'not_available':
-        story.append(Paragraph(
-            "<b>Note:</b> " + crossverify_data.get('message', 'Cross-verification endpoint not yet available'),
-            styles['Normal']
-        ))
-        story.append(Spacer(1, 0.2*inch))
+        _append_placeholder_story(
+            story,
+            "Field Verification Report",
+            crossverify_data.get('message', 'Cross-verification endpoint not yet available'),
+            styles,
+            generated_at
+        )
+        return
+    
+    # Title
+    title_style = styles['ReportTitle']
+    story.append(Paragraph("Field Verification Report", title_style))
+    story.append(Spacer(1, 0.3*inch))
     
     # Overall Score
-    score_style = ParagraphStyle(
-        'Score',
-        parent=styles['Normal'],
-        fontSize=16,
-        spaceAfter=20
-    )
+    score_style = styles['Score']
     
     overall_score = crossverify_data.get('overall_score', 0)
     story.append(Paragraph(f"<b>Overall Verification Score:</b> {overall_score:.1%}", score_style))
@@ -329,17 +398,7 @@ def create_crossverify_report_pdf(analysis_data: dict, output_path: str):
             ])
         
         table = Table(table_data, colWidths=[2*inch, 2*inch, 2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        table.setStyle(_table_style('MIDDLE'))
         
         story.append(table)
     
@@ -348,52 +407,122 @@ def create_crossverify_report_pdf(analysis_data: dict, output_path: str):
     # Discrepancies
     discrepancies = crossverify_data.get('discrepancies', [])
     if discrepancies:
-        story.append(Paragraph(f"<b>⚠️ Discrepancies Detected ({len(discrepancies)}):</b>", styles['Heading2']))
-        story.append(Spacer(1, 0.1*inch))
+        story.extend((
+            Paragraph(f"<b>⚠️ Discrepancies Detected ({len(discrepancies)}):</b>", styles['Heading2']),
+            Spacer(1, 0.1*inch)
+        ))
         
         for disc in discrepancies:
             field = disc.get('field', 'Unknown')
             details = disc.get('details', 'No details')
-            story.append(Paragraph(f"<b>{field.upper()}:</b> {details}", styles['Normal']))
-            story.append(Spacer(1, 0.08*inch))
+            story.extend((
+                Paragraph(f"<b>{field.upper()}:</b> {details}", styles['Normal']),
+                Spacer(1, 0.08*inch)
+            ))
     
     # Timestamp
     story.append(Spacer(1, 0.4*inch))
     story.append(Paragraph(
-        f"<i>Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</i>",
+        f"<i>Generated on {generated_at.strftime(TIMESTAMP_FORMAT)}</i>",
         styles['Normal']
     ))
+
+def _build_report_pdf(
+    output_path: Union[str, BinaryIO],
+    analysis_data: dict,
+    sections: tuple,
+    generated_at: Optional[datetime] = None
+):
+    """Build one PDF from one or more report sections, a page apart"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, PageBreak
+
+    doc = SimpleDocTemplate(output_path, pagesize=letter)
+    story = []
+    styles = _styles()
+    generated_at = generated_at or datetime.now(timezone.utc)
+    
+    for i, append_section in enumerate(sections):
+        if i:
+            story.append(PageBreak())
+        append_section(story, analysis_data, styles, generated_at)
     
     doc.build(story)
 
+def create_risk_report_pdf(
+    analysis_data: dict,
+    output_path: Union[str, BinaryIO],
+    *,
+    generated_at: Optional[datetime] = None
+):
+    """Generate Credit Risk Analysis Report PDF"""
+    _build_report_pdf(output_path, analysis_data, (_append_risk_story,), generated_at)
+
+def create_compliance_report_pdf(
+    analysis_data: dict,
+    output_path: Union[str, BinaryIO],
+    *,
+    generated_at: Optional[datetime] = None
+):
+    """Generate Compliance Analysis Report PDF"""
+    _build_report_pdf(output_path, analysis_data, (_append_compliance_story,), generated_at)
+
+def create_crossverify_report_pdf(
+    analysis_data: dict,
+    output_path: Union[str, BinaryIO],
+    *,
+    generated_at: Optional[datetime] = None
+):
+    """Generate Cross-Verification Report PDF"""
+    _build_report_pdf(output_path, analysis_data, (_append_crossverify_story,), generated_at)
 
-def create_certificate_pdf(dossier_data: dict, output_path: str):
+def create_combined_report_pdf(
+    analysis_data: dict,
+    output_path: Union[str, BinaryIO],
+    *,
+    generated_at: Optional[datetime] = None
+):
+    """Generate a single PDF with the risk, compliance and cross-verification reports"""
+    _build_report_pdf(output_path, analysis_data, (
+        _append_risk_story,
+        _append_compliance_story,
+        _append_crossverify_story,
+    ), generated_at)
+
+
+def create_certificate_pdf(
+    dossier_data: dict,
+    output_path: Union[str, BinaryIO],
+    *,
+    generated_at: Optional[datetime] = None
+):
     """Generate Blockchain Certificate PDF"""
-    doc = SimpleDocTemplate(output_path, pagesize=letter)
+    generated_at = generated_at or datetime.now(timezone.utc)
+    _render_certificate(dossier_data, output_path, generated_at.strftime(TIMESTAMP_FORMAT))
+
+def _render_certificate(
+    dossier_data: dict,
+    output_path: Union[str, BinaryIO],
+    timestamp: str,
+    **doc_options
+):
+    """Lay out the certificate page; doc_options go to SimpleDocTemplate"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+    doc = SimpleDocTemplate(output_path, pagesize=letter, **doc_options)
     story = []
-    styles = getSampleStyleSheet()
+    styles = _styles()
     
     # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=28,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
+    title_style = styles['CertificateTitle']
     story.append(Spacer(1, 1*inch))
     story.append(Paragraph("Certificate of Authenticity", title_style))
     story.append(Spacer(1, 0.5*inch))
     
     # Certificate content
-    cert_style = ParagraphStyle(
-        'Certificate',
-        parent=styles['Normal'],
-        fontSize=12,
-        spaceAfter=15,
-        alignment=TA_CENTER
-    )
+    cert_style = styles['Certificate']
     
     story.append(Paragraph(
         "This document certifies that the analysis dossier has been",
@@ -406,16 +535,11 @@ def create_certificate_pdf(dossier_data: dict, output_path: str):
     story.append(Spacer(1, 0.5*inch))
     
     # Details
-    details_style = ParagraphStyle(
-        'Details',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=10
-    )
+    details_style = styles['Details']
     
     story.append(Paragraph(f"<b>Dossier Hash:</b><br/>{dossier_data.get('sha256', 'N/A')}", details_style))
     story.append(Paragraph(f"<b>Transaction Hash:</b><br/>{dossier_data.get('tx_hash', 'Pending')}", details_style))
-    story.append(Paragraph(f"<b>Timestamp:</b><br/>{datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}", details_style))
+    story.append(Paragraph(f"<b>Timestamp:</b><br/>{timestamp}", details_style))
     
     if dossier_data.get('explorer_url'):
         story.append(Spacer(1, 0.3*inch))
@@ -426,6 +550,86 @@ def create_certificate_pdf(dossier_data: dict, output_path: str):
     
     doc.build(story)
 
+# Certificate bundled with every new dossier, before it is anchored on chain
+_PENDING_CERTIFICATE = {
+    "sha256": "To be generated",
+    "tx_hash": "Pending blockchain anchoring",
+    "explorer_url": None
+}
+
+# Stands in for the timestamp in the pre-rendered certificate. Same length
+# as TIMESTAMP_FORMAT output and only digits differ, which are equal width
+# in Helvetica, so substituting it changes neither layout nor byte offsets.
+_TIMESTAMP_PLACEHOLDER = b"0000-00-00 00:00:00 UTC"
+
+# The template is rendered in ReportLab's invariant mode, which writes this
+# fixed /CreationDate and /ModDate and a fixed /ID; each certificate gets
+# its own (same-length) values from generated_at and its content
+_INVARIANT_PDF_DATE = b"D:20000101000000+00'00'"
+_PDF_DATE_FORMAT = "D:%Y%m%d%H%M%S+00'00'"
+_PDF_ID_RE = re.compile(rb'/ID \n\[<([0-9a-f]{32})><\1>\]')
+
+@lru_cache(maxsize=1)
+def _pending_certificate_template() -> Optional[Tuple[bytes, bytes]]:
+    """
+    Render the pending certificate once, invariant and uncompressed
+    
+    Returns:
+        (PDF bytes, template /ID hex), or None if the timestamp
+        placeholder, dates or /ID could not be located
+    """
+    buffer = io.BytesIO()
+    _render_certificate(
+        _PENDING_CERTIFICATE,
+        buffer,
+        _TIMESTAMP_PLACEHOLDER.decode(),
+        pageCompression=0,
+        invariant=1
+    )
+    template = buffer.getvalue()
+    id_match = _PDF_ID_RE.search(template)
+    
+    if (
+        template.count(_TIMESTAMP_PLACEHOLDER) != 1
+        or template.count(_INVARIANT_PDF_DATE) != 2
+        or id_match is None
+    ):
+        print("Warning: certificate template fields not found; rendering per dossier")
+        return None
+    
+    return template, id_match.group(1)
+
+def create_pending_certificate_pdf(generated_at: datetime) -> bytes:
+    """
+    Generate the pending (not yet anchored) certificate PDF
+    
+    The visible timestamp and the /CreationDate and /ModDate entries all
+    come from generated_at, and /ID is derived from the stamped content.
+    
+    Args:
+        generated_at: Dossier generation time
+        
+    Returns:
+        PDF bytes
+    """
+    timestamp = generated_at.strftime(TIMESTAMP_FORMAT).encode()
+    pdf_date = generated_at.strftime(_PDF_DATE_FORMAT).encode()
+    template = _pending_certificate_template()
+    
+    if (
+        template is not None
+        and len(timestamp) == len(_TIMESTAMP_PLACEHOLDER)
+        and len(pdf_date) == len(_INVARIANT_PDF_DATE)
+    ):
+        pdf, template_id = template
+        pdf = pdf.replace(_TIMESTAMP_PLACEHOLDER, timestamp).replace(_INVARIANT_PDF_DATE, pdf_date)
+        # Fingerprint the stamped file, as ReportLab does outside invariant mode
+        return pdf.replace(template_id, hashlib.md5(pdf).hexdigest().encode())
+    
+    buffer = io.BytesIO()
+    create_certificate_pdf(_PENDING_CERTIFICATE, buffer, generated_at=generated_at)
+    return buffer.getvalue()
+
 def generate_and_upload_dossier(document_id: str, user_id: str) -> Tuple[str, str, str]:
     """
     Generate comprehensive dossier ZIP file
@@ -437,10 +641,25 @@ def generate_and_upload_dossier(document_id: str, user_id: str) -> Tuple[str, st
     Returns:
         Tuple of (dossier_url, sha256, dossier_id)
     """
-    # Fetch all related data
-    doc_result = supabase.table("documents").select("*").eq("id", document_id).execute()
-    analysis_result = supabase.table("analyses").select("*").eq("document_id", document_id).execute()
-    heatmap_result = supabase.table("heatmaps").select("*").eq("user_id", user_id).execute()
+    supabase = get_supabase()
+    
+    # Fetch all related data (independent queries, run concurrently)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        doc_future = executor.submit(
+            supabase.table("documents").select("*").eq("id", document_id).execute
+        )
+        analysis_future = executor.submit(
+            supabase.table("analyses").select("*").eq("document_id", document_id).execute
+        )
+        heatmap_future = executor.submit(
+            supabase.table("heatmaps").select(
+                "id, heatmap_path, content_sha1"
+            ).eq("user_id", user_id).execute
+        )
+    
+    doc_result = doc_future.result()
+    analysis_result = analysis_future.result()
+    heatmap_result = heatmap_future.result()
     
     if not doc_result.data:
         raise Exception("Document not found")
@@ -452,113 +671,123 @@ def generate_and_upload_dossier(document_id: str, user_id: str) -> Tuple[str, st
     analysis = analysis_result.data[0] if analysis_result.data else {}
     heatmaps = heatmap_result.data if heatmap_result.data else []
     
-    # Create temporary directory
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        # Create directory structure
-        original_docs_dir = os.path.join(tmp_dir, "original_documents")
-        reports_dir = os.path.join(tmp_dir, "reports")
-        visuals_dir = os.path.join(tmp_dir, "visuals")
+    zip_filename = f"{document_id}_dossier.zip"
+    storage_path = f"{user_id}/dossiers/{zip_filename}"
+    
+    # Reuse an existing dossier built from identical inputs
+    content_hash = hashlib.sha256(orjson.dumps(
+        {"analysis": analysis, "heatmaps": [h['id'] for h in heatmaps]},
+        default=str,
+        option=orjson.OPT_SORT_KEYS
+    )).hexdigest()
+    
+    cached = supabase.table("dossiers").select("id, sha256").eq(
+        "document_id", document_id
+    ).eq("content_hash", content_hash).limit(1).execute()
+    
+    if cached.data:
+        dossier_url = create_signed_url_for_path("dossiers", storage_path, expires=86400)
+        return dossier_url, cached.data[0]["sha256"], cached.data[0]["id"]
+    
+    # One timestamp for every artifact in this dossier
+    generated_at = datetime.now(timezone.utc)
+    
+    # Archive members as (arcname, bytes), zipped straight from memory
+    members = []
+    
+    # Identical heatmap images (same content hash or path) are fetched once
+    heatmap_paths = []
+    seen = set()
+    for heatmap in heatmaps:
+        path = heatmap.get('heatmap_path')
+        key = heatmap.get('content_sha1') or path
+        if path and key not in seen:
+            seen.add(key)
+            heatmap_paths.append(path)
+    
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        # 1. Start downloading the original PDF and heatmap images
+        pdf_future = executor.submit(
+            download_from_storage, "documents", document['storage_path']
+        )
+        heatmap_futures = {
+            i: executor.submit(download_from_storage, "heatmaps", path)
+            for i, path in enumerate(heatmap_paths, 1)
+        }
         
-        os.makedirs(original_docs_dir, exist_ok=True)
-        os.makedirs(reports_dir, exist_ok=True)
-        os.makedirs(visuals_dir, exist_ok=True)
+        # 2. Generate combined report PDF while the downloads run
+        report_buffer = io.BytesIO()
+        create_combined_report_pdf(analysis, report_buffer, generated_at=generated_at)
+        members.append(("reports/analysis_report.pdf", report_buffer.getvalue()))
         
-        # 1. Download original PDF
+        # 3. Collect downloaded files
         try:
-            pdf_data = download_from_storage("documents", document['storage_path'])
-            original_pdf_path = os.path.join(original_docs_dir, document['filename'])
-            with open(original_pdf_path, 'wb') as f:
-                f.write(pdf_data)
+            members.append((f"original_documents/{document['filename']}", pdf_future.result()))
         except Exception as e:
             print(f"Warning: Could not download original PDF: {e}")
         
-        # 2. Generate report PDFs
-        risk_report_path = os.path.join(reports_dir, "risk_report.pdf")
-        compliance_report_path = os.path.join(reports_dir, "compliance_report.pdf")
-        crossverify_report_path = os.path.join(reports_dir, "cross_verify_report.pdf")
-        
-        create_risk_report_pdf(analysis, risk_report_path)
-        create_compliance_report_pdf(analysis, compliance_report_path)
-        create_crossverify_report_pdf(analysis, crossverify_report_path)
-        
-        # 3. Download heatmap images
-        for i, heatmap in enumerate(heatmaps, 1):
+        for i, heatmap_future in heatmap_futures.items():
             try:
-                if heatmap.get('heatmap_path'):
-                    heatmap_data = download_from_storage("heatmaps", heatmap['heatmap_path'])
-                    heatmap_filename = f"heatmap{i}.png"
-                    heatmap_path = os.path.join(visuals_dir, heatmap_filename)
-                    with open(heatmap_path, 'wb') as f:
-                        f.write(heatmap_data)
+                members.append((f"visuals/heatmap{i}.png", heatmap_future.result()))
             except Exception as e:
                 print(f"Warning: Could not download heatmap: {e}")
-        
-        # 4. Create metadata.json
-        metadata = {
-            "document": {
-                "id": document['id'],
-                "filename": document['filename'],
-                "sha256": document['sha256'],
-                "uploaded_at": str(document.get('created_at'))
-            },
-            "analysis": {
-                "risk_score": analysis.get('risk', {}).get('risk_score'),
-                "compliance_score": analysis.get('compliance', {}).get('compliance_score'),
-                "crossverify_score": analysis.get('crossverify', {}).get('overall_score')
-            },
-            "generated_at": datetime.now().isoformat()
-        }
-        
-        metadata_path = os.path.join(tmp_dir, "metadata.json")
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2, default=str)
-        
-        # 5. Create certificate.pdf (placeholder until blockchain anchoring)
-        certificate_path = os.path.join(tmp_dir, "certificate.pdf")
-        create_certificate_pdf({
-            "sha256": "To be generated",
-            "tx_hash": "Pending blockchain anchoring",
-            "explorer_url": None
-        }, certificate_path)
-        
-        # 6. Create ZIP file
-        zip_filename = f"{document_id}_dossier.zip"
-        zip_path = os.path.join(tmp_dir, zip_filename)
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(tmp_dir):
-                for file in files:
-                    if file == zip_filename:
-                        continue
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, tmp_dir)
-                    zipf.write(file_path, arcname)
-        
-        # 7. Calculate SHA256 of ZIP
-        with open(zip_path, 'rb') as f:
-            zip_data = f.read()
-            sha256 = hashlib.sha256(zip_data).hexdigest()
-        
-        # 8. Upload to storage
-        storage_path = f"{user_id}/dossiers/{zip_filename}"
-        
-        from .storage import upload_bytes_to_storage
-        upload_bytes_to_storage("dossiers", storage_path, zip_data, "application/zip")
-        
-        # 9. Generate signed URL
-        dossier_url = create_signed_url_for_path("dossiers", storage_path, expires=86400)  # 24 hours
-        
-        # 10. Store in database
-        dossier_result = supabase.table("dossiers").insert({
-            "document_id": document_id,
-            "user_id": user_id,
-            "dossier_url": dossier_url,
-            "sha256": sha256
-        }).execute()
-        
-        if not dossier_result.data:
-            raise Exception("Failed to store dossier record")
-        
-        dossier_id = dossier_result.data[0]["id"]
-        
-        return dossier_url, sha256, dossier_id
\ No newline at end of file
+    
+    # 4. Create metadata.json (values are pre-coerced to JSON types)
+    uploaded_at = document.get('created_at')
+    if isinstance(uploaded_at, datetime):
+        uploaded_at = uploaded_at.isoformat()
+    
+    metadata = {
+        "document": {
+            "id": document['id'],
+            "filename": document['filename'],
+            "sha256": document['sha256'],
+            "uploaded_at": str(uploaded_at)
+        },
+        "analysis": {
+            "risk_score": analysis.get('risk', {}).get('risk_score'),
+            "compliance_score": analysis.get('compliance', {}).get('compliance_score'),
+            "crossverify_score": analysis.get('crossverify', {}).get('overall_score')
+        },
+        "generated_at": generated_at.isoformat()
+    }
+    members.append(("metadata.json", orjson.dumps(metadata, option=orjson.OPT_INDENT_2)))
+    
+    # 5. Create certificate.pdf (placeholder until blockchain anchoring)
+    members.append(("certificate.pdf", create_pending_certificate_pdf(generated_at)))
+    
+    # 6. Create ZIP file in memory
+    zip_buffer = io.BytesIO()
+    
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+        for arcname, data in members:
+            compress_type = (
+                zipfile.ZIP_STORED if arcname.startswith(_STORED_PREFIXES)
+                else zipfile.ZIP_DEFLATED
+            )
+            zipf.writestr(arcname, data, compress_type=compress_type)
+    
+    # 7. SHA256 of ZIP
+    sha256 = hashlib.sha256(zip_buffer.getbuffer()).hexdigest()
+    
+    # 8. Upload to storage
+    upload_bytes_to_storage("dossiers", storage_path, zip_buffer.getvalue(), "application/zip")
+    
+    # 9. Generate signed URL
+    dossier_url = create_signed_url_for_path("dossiers", storage_path, expires=86400)  # 24 hours
+    
+    # 10. Store in database
+    dossier_result = supabase.table("dossiers").insert({
+        "document_id": document_id,
+        "user_id": user_id,
+        "dossier_url": dossier_url,
+        "sha256": sha256,
+        "content_hash": content_hash
+    }).execute()
+    
+    if not dossier_result.data:
+        raise Exception("Failed to store dossier record")
+    
+    dossier_id = dossier_result.data[0]["id"]
+    
+    return dossier_url, sha256, dossier_id
\ No newline at end of file
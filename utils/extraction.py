@@ -1,21 +1,179 @@
 """
 Text extraction utilities for IRIS
-Handles PDF text extraction using pdfplumber and OCR fallback
+Handles PDF text extraction using pypdfium2 with a pdfplumber fallback
 """
 
 import os
+import time
 import tempfile
-from typing import List, Tuple
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Tuple, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+from ._supabase import get_supabase
+from .storage import create_signed_url_for_path
 import pdfplumber
+import pypdfium2
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SERVICE_KEY)
+supabase: Client = get_supabase()
+
+# Document download: signed URL lifetime (s), request timeout (s), chunk size
+DOWNLOAD_URL_EXPIRES = 600
+DOWNLOAD_TIMEOUT = 60
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Max rows per extracted_texts insert request
+INSERT_BATCH_SIZE = 500
+
+# Worker processes for page extraction; each gets at least this many pages
+EXTRACTION_WORKERS = os.cpu_count() or 1
+MIN_PAGES_PER_WORKER = 8
+
+# One process pool shared by every extraction, created on first use
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_pool_lock = threading.Lock()
+
+# Read-through cache for extracted text lookups, keyed by
+# (document_id, lookup, *args) -> (expires_at, value). The short TTL bounds
+# staleness when another worker process rewrites a document's pages.
+_TEXT_CACHE: Dict[tuple, Tuple[float, Any]] = {}
+_TEXT_CACHE_MAX = 1024
+_TEXT_CACHE_TTL = 60
+_text_cache_lock = threading.Lock()
+
+# PDFium is not thread-safe and pypdfium2 does not serialize calls itself, so
+# every in-process PDFium call (background tasks run on a threadpool) holds this
+_pdfium_lock = threading.Lock()
+
+def _cached_lookup(key: tuple, load: Callable[[], Any]) -> Any:
+    """
+    Return the cached value for `key`, calling `load` on a miss or expiry
+    """
+    now = time.time()
+    
+    with _text_cache_lock:
+        cached = _TEXT_CACHE.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    value = load()
+    
+    with _text_cache_lock:
+        if len(_TEXT_CACHE) >= _TEXT_CACHE_MAX:
+            # Drop expired entries, then the oldest if still full
+            for k in [k for k, (exp, _) in _TEXT_CACHE.items() if exp <= now]:
+                del _TEXT_CACHE[k]
+            if len(_TEXT_CACHE) >= _TEXT_CACHE_MAX:
+                del _TEXT_CACHE[next(iter(_TEXT_CACHE))]
+        _TEXT_CACHE[key] = (now + _TEXT_CACHE_TTL, value)
+    
+    return value
+
+def invalidate_document_text_cache(document_id: Optional[str] = None) -> None:
+    """
+    Drop cached text lookups after extracted_texts rows change
+    
+    Args:
+        document_id: Document UUID, or None to clear every document
+    """
+    with _text_cache_lock:
+        if document_id is None:
+            _TEXT_CACHE.clear()
+            return
+        for key in [key for key in _TEXT_CACHE if key[0] == document_id]:
+            del _TEXT_CACHE[key]
+
+def _get_extraction_pool() -> ProcessPoolExecutor:
+    """
+    Get the shared page extraction pool (at most EXTRACTION_WORKERS processes)
+    
+    Workers are spawned rather than forked: extraction is started from
+    threadpool threads, and a fork would copy locks held by other threads
+    (HTTP connection pool, PDFium) into the child.
+    """
+    global _extraction_pool
+    
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extraction_pool
+
+def _discard_extraction_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next extraction starts a fresh one"""
+    global _extraction_pool
+    
+    with _extraction_pool_lock:
+        if _extraction_pool is pool:
+            _extraction_pool = None
+    pool.shutdown(wait=False)
+
+def _extract_page_range(
+    pdf_path: str,
+    start: int,
+    stop: int
+) -> List[Tuple[int, str, Optional[str]]]:
+    """
+    Extract text from pages [start, stop) of a PDF (0-indexed)
+    
+    Runs in a worker process for large documents, so it reopens the file
+    and reports per-page failures instead of raising. Text comes from
+    PDFium (under _pdfium_lock); pages where it finds none are retried with
+    pdfplumber.
+    
+    Returns:
+        List of tuples (page_number, text, error)
+    """
+    results = []
+    fallback_pdf = None
+    with _pdfium_lock:
+        pdf = pypdfium2.PdfDocument(pdf_path)
+    
+    try:
+        for index in range(start, stop):
+            try:
+                with _pdfium_lock:
+                    page = pdf[index]
+                    try:
+                        textpage = page.get_textpage()
+                        try:
+                            text = textpage.get_text_range()
+                        finally:
+                            textpage.close()
+                    finally:
+                        page.close()
+                # PDFium ends lines with CRLF; pdfplumber (and the parser) use LF
+                text = text.replace("\r\n", "\n").strip()
+                
+                if not text:
+                    if fallback_pdf is None:
+                        fallback_pdf = pdfplumber.open(pdf_path)
+                    fallback_page = fallback_pdf.pages[index]
+                    text = (fallback_page.extract_text() or "").strip()
+                    # Drop the parsed chars/rects so earlier pages don't pile up
+                    fallback_page.flush_cache()
+                    fallback_page.close()
+                
+                results.append((index + 1, text, None))
+            except Exception as e:
+                results.append((index + 1, "", str(e)))
+    finally:
+        with _pdfium_lock:
+            pdf.close()
+        if fallback_pdf is not None:
+            fallback_pdf.close()
+    
+    return results
 
 def extract_and_store_texts(
     document_id: str, 
@@ -33,47 +191,67 @@ def extract_and_store_texts(
     Returns:
         List of tuples (page_number, text)
     """
-    # Download document from storage
+    # Stream document from storage straight into a temporary file, over the
+    # shared client's keep-alive connection pool
+    tmp_path = None
     try:
-        data = supabase.storage.from_("documents").download(storage_path)
+        url = create_signed_url_for_path("documents", storage_path, expires=DOWNLOAD_URL_EXPIRES)
+        http_client = supabase.options.httpx_client
+        with http_client.stream("GET", url, timeout=DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+                tmp_path = tmp_file.name
+                for chunk in response.iter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    tmp_file.write(chunk)
     except Exception as e:
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except:
+                pass
         raise Exception(f"Failed to download document: {str(e)}")
     
-    # Create temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        tmp_path = tmp_file.name
-        tmp_file.write(data)
-    
     texts = []
+    rows = []
     
     try:
-        # Extract text using pdfplumber
-        with pdfplumber.open(tmp_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                try:
-                    # Extract text from page
-                    text = page.extract_text()
-                    
-                    if not text:
-                        text = ""
-                    
-                    # Clean text
-                    text = text.strip()
-                    
-                    texts.append((page_num, text))
-                    
-                    # Store in database
-                    supabase.table("extracted_texts").insert({
-                        "document_id": document_id,
-                        "user_id": user_id,
-                        "page_number": page_num,
-                        "text": text
-                    }).execute()
-                    
-                except Exception as e:
-                    print(f"Warning: Failed to extract text from page {page_num}: {str(e)}")
-                    # Continue with other pages
-                    texts.append((page_num, ""))
+        with _pdfium_lock:
+            pdf = pypdfium2.PdfDocument(tmp_path)
+            page_count = len(pdf)
+            pdf.close()
+        
+        # Large PDFs are split into page ranges extracted in worker processes
+        workers = min(EXTRACTION_WORKERS, page_count // MIN_PAGES_PER_WORKER)
+        
+        if workers <= 1:
+            results = _extract_page_range(tmp_path, 0, page_count)
+        else:
+            step = -(-page_count // workers)
+            executor = _get_extraction_pool()
+            try:
+                futures = [
+                    executor.submit(_extract_page_range, tmp_path, start, min(start + step, page_count))
+                    for start in range(0, page_count, step)
+                ]
+                results = [result for future in futures for result in future.result()]
+            except BrokenProcessPool:
+                _discard_extraction_pool(executor)
+                raise
+        
+        for page_num, text, error in results:
+            if error is not None:
+                print(f"Warning: Failed to extract text from page {page_num}: {error}")
+                # Continue with other pages
+                texts.append((page_num, ""))
+                continue
+            
+            texts.append((page_num, text))
+            rows.append({
+                "document_id": document_id,
+                "user_id": user_id,
+                "page_number": page_num,
+                "text": text
+            })
                     
     except Exception as e:
         raise Exception(f"PDF extraction failed: {str(e)}")
@@ -84,6 +262,17 @@ def extract_and_store_texts(
         except:
             pass
     
+    # Store in database, one request per batch of pages
+    try:
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            supabase.table("extracted_texts").insert(
+                rows[start:start + INSERT_BATCH_SIZE]
+            ).execute()
+    except Exception as e:
+        print(f"Warning: Failed to store extracted text: {str(e)}")
+    finally:
+        invalidate_document_text_cache(document_id)
+    
     return texts
 
 def get_document_full_text(document_id: str) -> str:
@@ -96,7 +285,11 @@ def get_document_full_text(document_id: str) -> str:
     Returns:
         Full text string
     """
-    result = supabase.table("extracted_texts").select("page_number, text").eq(
+    return _cached_lookup((document_id, "full_text"), lambda: _load_full_text(document_id))
+
+def _load_full_text(document_id: str) -> str:
+    """Fetch and join all page texts (uncached)"""
+    result = supabase.table("extracted_texts").select("text").eq(
         "document_id", document_id
     ).order("page_number").execute()
     
@@ -104,7 +297,7 @@ def get_document_full_text(document_id: str) -> str:
         return ""
     
     # Concatenate all pages
-    full_text = "\n\n".join([page["text"] for page in result.data])
+    full_text = "\n\n".join(page["text"] for page in result.data)
     
     return full_text
 
@@ -119,6 +312,13 @@ def get_document_page_text(document_id: str, page_number: int) -> str:
     Returns:
         Page text
     """
+    return _cached_lookup(
+        (document_id, "page_text", page_number),
+        lambda: _load_page_text(document_id, page_number)
+    )
+
+def _load_page_text(document_id: str, page_number: int) -> str:
+    """Fetch a single page text (uncached)"""
     result = supabase.table("extracted_texts").select("text").eq(
         "document_id", document_id
     ).eq("page_number", page_number).execute()
@@ -138,11 +338,16 @@ def get_document_page_count(document_id: str) -> int:
     Returns:
         Number of pages
     """
-    result = supabase.table("extracted_texts").select("page_number").eq(
-        "document_id", document_id
-    ).execute()
+    return _cached_lookup((document_id, "page_count"), lambda: _load_page_count(document_id))
+
+def _load_page_count(document_id: str) -> int:
+    """Count extracted pages (uncached)"""
+    # Count-only request: no rows in the response body
+    result = supabase.table("extracted_texts").select(
+        "page_number", count="exact", head=True
+    ).eq("document_id", document_id).execute()
     
-    return len(result.data) if result.data else 0
+    return result.count or 0
 
 def search_text_in_document(document_id: str, search_term: str) -> List[dict]:
     """
@@ -155,9 +360,23 @@ def search_text_in_document(document_id: str, search_term: str) -> List[dict]:
     Returns:
         List of matches with page numbers
     """
+    matches = _cached_lookup(
+        (document_id, "search", search_term),
+        lambda: _search_text(document_id, search_term)
+    )
+    # Callers get their own list so they can't mutate the cached one
+    return list(matches)
+
+def _search_text(document_id: str, search_term: str) -> List[dict]:
+    """Search extracted pages for a term (uncached)"""
+    # Filter in Postgres so only matching pages come back; escape LIKE
+    # wildcards so the term is matched literally
+    pattern = (
+        search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
     result = supabase.table("extracted_texts").select("page_number, text").eq(
         "document_id", document_id
-    ).execute()
+    ).ilike("text", f"%{pattern}%").order("page_number").execute()
     
     if not result.data:
         return []
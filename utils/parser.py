@@ -4,21 +4,261 @@ Extracts and classifies structured fields for ML credit risk prediction
 """
 
 import re
-from typing import Optional, Dict, Any
+import hashlib
+import threading
+import ahocorasick
+from functools import lru_cache
+from typing import Optional, Dict, Any, Tuple, Pattern, Match, AbstractSet
 from datetime import datetime
 
-def extract_age(text: str) -> Optional[int]:
+# Parsed fields keyed by SHA-256 of the document text, so re-analysis and
+# duplicate uploads of the same document skip the extractors entirely
+_PARSE_CACHE: Dict[str, Dict[str, Any]] = {}
+_PARSE_CACHE_MAX = 256
+_parse_cache_lock = threading.Lock()
+
+# Patterns are compiled once at import. Every extractor matches against the
+# lowercased text; parse_credit_fields lowers it once and passes it through
+# as `text_lower`, and standalone calls lower it themselves.
+
+_AGE_PATTERNS = tuple(re.compile(p) for p in [
+    r'age[:\s]+(\d{2,3})',
+    r'(\d{2})\s*years?\s*old',
+    r'age[:\s]*(\d{2,3})\s*years?',
+    r'dob[:\s]+(\d{1,2})[/-](\d{1,2})[/-](\d{4})',
+    r'date\s+of\s+birth[:\s]+(\d{1,2})[/-](\d{1,2})[/-](\d{4})',
+])
+
+_GENDER_MALE_RE = re.compile(r'\bgender[:\s]*(male|m)\b')
+_GENDER_FEMALE_RE = re.compile(r'\bgender[:\s]*(female|f)\b')
+_MALE_TITLE_RE = re.compile(r'\b(mr\.|mr|sir)\b')
+_FEMALE_TITLE_RE = re.compile(r'\b(mrs\.|mrs|ms\.|ms|miss)\b')
+_FEMALE_TITLE_OR_MADAM_RE = re.compile(r'\b(mrs\.|mrs|ms\.|ms|miss|madam)\b')
+
+_UNEMPLOYED_RE = re.compile(r'\b(unemployed|jobless|not\s+working|no\s+job|not\s+employed)\b')
+_EMPLOYMENT_MENTION_RE = re.compile(r'\b(employed|occupation|profession|job|work|working)\b')
+
+# Job keywords by category, highest priority first
+_JOB_KEYWORDS = (
+    ("highly skilled", (
+        'engineer', 'doctor', 'lawyer', 'architect', 'professor', 'surgeon',
+        'manager', 'director', 'ceo', 'cfo', 'cto', 'executive', 'vp',
+        'consultant', 'analyst', 'scientist', 'researcher', 'specialist',
+        'chartered accountant', 'ca', 'mba', 'phd', 'md'
+    )),
+    ("skilled", (
+        'technician', 'nurse', 'teacher', 'accountant', 'programmer', 'developer',
+        'electrician', 'plumber', 'mechanic', 'carpenter', 'chef', 'cook',
+        'officer', 'supervisor', 'coordinator', 'administrator', 'designer',
+        'clerk', 'cashier', 'operator', 'driver', 'salesman'
+    )),
+    ("unskilled", (
+        'helper', 'assistant', 'cleaner', 'guard', 'security',
+        'laborer', 'labourer', 'worker', 'peon', 'attendant',
+        'watchman', 'housekeeping', 'daily wage'
+    )),
+)
+
+# Loan purpose keywords, highest priority first
+_PURPOSE_KEYWORDS = (
+    ("business", ('business', 'enterprise', 'startup', 'commercial', 'shop', 'office')),
+    ("car", ('car', 'vehicle', 'automobile', 'auto', 'bike', 'motorcycle')),
+    ("domestic appliances", ('appliance', 'refrigerator', 'fridge', 'washing machine', 'microwave', 'ac', 'air conditioner')),
+    ("education", ('education', 'study', 'course', 'tuition', 'school', 'college', 'university', 'training')),
+    ("furniture/equipment", ('furniture', 'equipment', 'furnishing', 'sofa', 'bed', 'table')),
+    ("radio/TV", ('radio', 'tv', 'television', 'electronics', 'audio', 'video')),
+    ("repairs", ('repair', 'renovation', 'maintenance', 'fix', 'remodel')),
+)
+
+def _best_group(pattern: Pattern, text: str) -> Optional[int]:
+    """Index (0-based) of the highest-priority group matched anywhere in `text`"""
+    best = None
+    
+    for match in pattern.finditer(text):
+        index = match.lastindex - 1
+        if best is None or index < best:
+            best = index
+            if best == 0:
+                break
+    
+    return best
+
+def _keyword_automaton(categories) -> ahocorasick.Automaton:
+    """
+    Build an Aho-Corasick automaton mapping each keyword to the index of its
+    category, so one pass over the text finds every (overlapping) keyword
+    """
+    automaton = ahocorasick.Automaton()
+    
+    for priority, (_, keywords) in enumerate(categories):
+        for keyword in keywords:
+            if keyword not in automaton:
+                automaton.add_word(keyword, priority)
+    
+    automaton.make_automaton()
+    return automaton
+
+_JOB_AUTOMATON = _keyword_automaton(_JOB_KEYWORDS)
+_PURPOSE_AUTOMATON = _keyword_automaton(_PURPOSE_KEYWORDS)
+
+def _best_keyword_category(
+    automaton: ahocorasick.Automaton,
+    categories,
+    text: str
+) -> Optional[str]:
+    """Highest-priority category with any keyword occurring in `text`"""
+    best = None
+    
+    for _, priority in automaton.iter(text):
+        if best is None or priority < best:
+            best = priority
+            if best == 0:
+                break
+    
+    return categories[best][0] if best is not None else None
+
+# (housing type, pattern) in the order they are tried
+_HOUSING_PATTERNS = tuple((housing, re.compile(p)) for housing, p in [
+    ("own", r'\b(own|owned|owner|self[- ]owned|property\s+owner)\b'),
+    ("rent", r'\b(rent|rented|rental|tenant|lease|leased|renting)\b'),
+    ("free", r'\b(free|provided|company\s+housing|parents|family\s+house|no\s+rent)\b'),
+])
+
+# Level alternations: one capturing group per level, in priority order,
+# inside a lookahead so a match never hides an overlapping one
+_SAVINGS_LEVELS = ("none", "little", "quite rich", "rich", "moderate")
+_SAVINGS_LEVEL_RE = re.compile(
+    r'saving(?=[s]?[:\s]*(?:'
+    r'(none|no|zero|nil|\b0\b)'
+    r'|(little|small|minimal|low)'
+    r'|(quite\s+rich|very\s+good|substantial|significant)'
+    r'|(rich|high|excellent|strong)'
+    r'|(moderate|average|medium|fair)'
+    r'))'
+)
+
+_CHECKING_LEVELS = ("none", "little", "rich", "moderate")
+_CHECKING_LEVEL_RE = re.compile(
+    r'checking(?=[:\s]*(?:'
+    r'(none|no|zero|nil|\b0\b)'
+    r'|(little|small|minimal|low)'
+    r'|(rich|high|substantial|significant)'
+    r'|(moderate|average|medium|fair)'
+    r'))'
+)
+
+# Currency marker and amount subpatterns; _AMOUNT is the capturing group
+_CURRENCY = r'(?:rs\.?|₹|inr|\$)'
+_AMOUNT = r'(\d+(?:,\d{3})*(?:\.\d{2})?)'
+_MONEY = rf'{_CURRENCY}?\s*{_AMOUNT}'
+
+_CREDIT_AMOUNT_PATTERNS = tuple(re.compile(p) for p in [
+    rf'(?:loan|credit)\s*(?:amount|sum)?[:\s]*{_MONEY}',
+    rf'(?:amount|sum)[:\s]*{_MONEY}',
+    rf'{_CURRENCY}\s*{_AMOUNT}',
+    rf'principal[:\s]*{_MONEY}'
+])
+
+_DURATION_MONTH_PATTERNS = tuple(re.compile(p) for p in [
+    r'duration[:\s]*(\d+)\s*months?',
+    r'tenure[:\s]*(\d+)\s*months?',
+    r'period[:\s]*(\d+)\s*months?',
+    r'term[:\s]*(\d+)\s*months?',
+    r'(\d+)\s*months?\s*(?:loan|tenure|period|term)',
+])
+
+_DURATION_YEAR_PATTERNS = tuple(re.compile(p) for p in [
+    r'duration[:\s]*(\d+)\s*years?',
+    r'tenure[:\s]*(\d+)\s*years?',
+    r'period[:\s]*(\d+)\s*years?',
+    r'term[:\s]*(\d+)\s*years?',
+])
+
+_PURPOSE_FIELD_RE = re.compile(r'purpose[:\s]*([a-zA-Z\s/]+)')
+
+# Words at least one of which occurs in any match of the pattern. Patterns
+# that don't start with a literal are slow to scan for, so a single
+# Aho-Corasick pre-pass records which words are present and patterns whose
+# words are all absent are skipped.
+_PATTERN_HINTS: Dict[Pattern, Tuple[str, ...]] = {
+    _AGE_PATTERNS[0]: ('age',),
+    _AGE_PATTERNS[1]: ('year',),
+    _AGE_PATTERNS[2]: ('age',),
+    _AGE_PATTERNS[3]: ('dob',),
+    _AGE_PATTERNS[4]: ('birth',),
+    _GENDER_MALE_RE: ('gender',),
+    _GENDER_FEMALE_RE: ('gender',),
+    _MALE_TITLE_RE: ('mr', 'sir'),
+    _FEMALE_TITLE_RE: ('mr', 'ms', 'miss'),
+    _FEMALE_TITLE_OR_MADAM_RE: ('mr', 'ms', 'miss', 'madam'),
+    _UNEMPLOYED_RE: ('employed', 'job', 'working'),
+    _EMPLOYMENT_MENTION_RE: ('employed', 'occupation', 'profession', 'job', 'work'),
+    _HOUSING_PATTERNS[0][1]: ('own',),
+    _HOUSING_PATTERNS[1][1]: ('rent', 'tenant', 'lease'),
+    _HOUSING_PATTERNS[2][1]: ('free', 'provided', 'hous', 'parents', 'rent'),
+    _CREDIT_AMOUNT_PATTERNS[0]: ('loan', 'credit'),
+    _CREDIT_AMOUNT_PATTERNS[1]: ('amount', 'sum'),
+    _CREDIT_AMOUNT_PATTERNS[2]: ('rs', '₹', 'inr', '$'),
+    _CREDIT_AMOUNT_PATTERNS[3]: ('principal',),
+    **{pattern: ('month',) for pattern in _DURATION_MONTH_PATTERNS},
+    **{pattern: ('year',) for pattern in _DURATION_YEAR_PATTERNS},
+}
+
+def _hint_automaton() -> ahocorasick.Automaton:
+    """Build an Aho-Corasick automaton over every hint word"""
+    automaton = ahocorasick.Automaton()
+    
+    for words in _PATTERN_HINTS.values():
+        for word in words:
+            automaton.add_word(word, word)
+    
+    automaton.make_automaton()
+    return automaton
+
+_HINT_AUTOMATON = _hint_automaton()
+
+def _find_hints(text_lower: str) -> frozenset:
+    """Hint words (see _PATTERN_HINTS) occurring in the text, in one pass"""
+    return frozenset(word for _, word in _HINT_AUTOMATON.iter(text_lower))
+
+def _search(
+    pattern: Pattern,
+    text_lower: str,
+    hints: Optional[AbstractSet[str]] = None
+) -> Optional[Match]:
+    """
+    pattern.search(text_lower), short-circuited when none of the pattern's
+    hint words occur; without a pre-pass `hints` set they are checked directly
+    """
+    words = _PATTERN_HINTS.get(pattern)
+    if words:
+        if hints is None:
+            if not any(word in text_lower for word in words):
+                return None
+        elif hints.isdisjoint(words):
+            return None
+    
+    return pattern.search(text_lower)
+
+@lru_cache(maxsize=None)
+def _account_amount_patterns(account_type: str) -> Tuple[Pattern, ...]:
+    """Compiled balance patterns for an account type ('saving', 'checking')"""
+    return tuple(re.compile(p) for p in [
+        rf'{account_type}[:\s]*(?:balance|account)?[:\s]*{_MONEY}',
+        rf'{account_type}[:\s]*(?:a/c|acc)[:\s]*{_MONEY}',
+    ])
+
+def extract_age(
+    text: str,
+    text_lower: Optional[str] = None,
+    hints: Optional[AbstractSet[str]] = None
+) -> Optional[int]:
     """Extract age from text (18-100)"""
-    patterns = [
-        r'age[:\s]+(\d{2,3})',
-        r'(\d{2})\s*years?\s*old',
-        r'age[:\s]*(\d{2,3})\s*years?',
-        r'dob[:\s]+(\d{1,2})[/-](\d{1,2})[/-](\d{4})',
-        r'date\s+of\s+birth[:\s]+(\d{1,2})[/-](\d{1,2})[/-](\d{4})',
-    ]
+    if text_lower is None:
+        text_lower = text.lower()
     
-    for pattern in patterns:
-        match = re.search(pattern, text.lower())
+    for pattern in _AGE_PATTERNS:
+        match = _search(pattern, text_lower, hints)
         if match:
             if len(match.groups()) == 3:  # DOB format
                 year = int(match.group(3))
@@ -33,99 +273,81 @@ def extract_age(text: str) -> Optional[int]:
     
     return None
 
-def extract_gender(text: str) -> Optional[str]:
+def extract_gender(
+    text: str,
+    text_lower: Optional[str] = None,
+    hints: Optional[AbstractSet[str]] = None
+) -> Optional[str]:
     """Extract gender (male/female)"""
-    text_lower = text.lower()
+    if text_lower is None:
+        text_lower = text.lower()
     
     # Look for explicit gender mentions
-    if re.search(r'\bgender[:\s]*(male|m)\b', text_lower):
+    if _search(_GENDER_MALE_RE, text_lower, hints):
         return "male"
-    elif re.search(r'\bgender[:\s]*(female|f)\b', text_lower):
+    elif _search(_GENDER_FEMALE_RE, text_lower, hints):
         return "female"
     
     # Look for titles
-    if re.search(r'\b(mr\.|mr|sir)\b', text_lower) and not re.search(r'\b(mrs\.|mrs|ms\.|ms|miss)\b', text_lower):
+    if _search(_MALE_TITLE_RE, text_lower, hints) and not _search(_FEMALE_TITLE_RE, text_lower, hints):
         return "male"
-    elif re.search(r'\b(mrs\.|mrs|ms\.|ms|miss|madam)\b', text_lower):
+    elif _search(_FEMALE_TITLE_OR_MADAM_RE, text_lower, hints):
         return "female"
     
     return None
 
-def classify_job_category(text: str) -> str:
+def classify_job_category(
+    text: str,
+    text_lower: Optional[str] = None,
+    hints: Optional[AbstractSet[str]] = None
+) -> str:
     """Classify job into: unemployed, unskilled, skilled, highly skilled"""
-    text_lower = text.lower()
+    if text_lower is None:
+        text_lower = text.lower()
     
     # Check unemployed first
-    if re.search(r'\b(unemployed|jobless|not\s+working|no\s+job|not\s+employed)\b', text_lower):
+    if _search(_UNEMPLOYED_RE, text_lower, hints):
         return "unemployed"
     
-    # Highly skilled patterns
-    highly_skilled_keywords = [
-        'engineer', 'doctor', 'lawyer', 'architect', 'professor', 'surgeon',
-        'manager', 'director', 'ceo', 'cfo', 'cto', 'executive', 'vp',
-        'consultant', 'analyst', 'scientist', 'researcher', 'specialist',
-        'chartered accountant', 'ca', 'mba', 'phd', 'md'
-    ]
-    
-    # Skilled patterns
-    skilled_keywords = [
-        'technician', 'nurse', 'teacher', 'accountant', 'programmer', 'developer',
-        'electrician', 'plumber', 'mechanic', 'carpenter', 'chef', 'cook',
-        'officer', 'supervisor', 'coordinator', 'administrator', 'designer',
-        'clerk', 'cashier', 'operator', 'driver', 'salesman'
-    ]
-    
-    # Unskilled patterns
-    unskilled_keywords = [
-        'helper', 'assistant', 'cleaner', 'guard', 'security',
-        'laborer', 'labourer', 'worker', 'peon', 'attendant',
-        'watchman', 'housekeeping', 'daily wage'
-    ]
-    
-    # Check categories
-    for keyword in highly_skilled_keywords:
-        if keyword in text_lower:
-            return "highly skilled"
-    
-    for keyword in skilled_keywords:
-        if keyword in text_lower:
-            return "skilled"
-    
-    for keyword in unskilled_keywords:
-        if keyword in text_lower:
-            return "unskilled"
+    # Check categories (highly skilled > skilled > unskilled)
+    category = _best_keyword_category(_JOB_AUTOMATON, _JOB_KEYWORDS, text_lower)
+    if category:
+        return category
     
     # Look for occupation/job/employment mentions
-    if re.search(r'\b(employed|occupation|profession|job|work|working)\b', text_lower):
+    if _search(_EMPLOYMENT_MENTION_RE, text_lower, hints):
         return "skilled"  # Default assumption
     
     return "unemployed"
 
-def classify_housing_type(text: str) -> str:
+def classify_housing_type(
+    text: str,
+    text_lower: Optional[str] = None,
+    hints: Optional[AbstractSet[str]] = None
+) -> str:
     """Classify housing: free, rent, own"""
-    text_lower = text.lower()
-    
-    # Own patterns
-    if re.search(r'\b(own|owned|owner|self[- ]owned|property\s+owner)\b', text_lower):
-        return "own"
+    if text_lower is None:
+        text_lower = text.lower()
     
-    # Rent patterns
-    if re.search(r'\b(rent|rented|rental|tenant|lease|leased|renting)\b', text_lower):
-        return "rent"
-    
-    # Free patterns
-    if re.search(r'\b(free|provided|company\s+housing|parents|family\s+house|no\s+rent)\b', text_lower):
-        return "free"
+    # Own, then rent, then free patterns
+    for housing, pattern in _HOUSING_PATTERNS:
+        if _search(pattern, text_lower, hints):
+            return housing
     
     # Default
     return "rent"
 
-def classify_savings_level(text: str) -> str:
+def classify_savings_level(text: str, text_lower: Optional[str] = None) -> str:
     """Classify savings: none, little, moderate, quite rich, rich"""
-    text_lower = text.lower()
+    if text_lower is None:
+        text_lower = text.lower()
+    
+    # Every savings pattern starts with "saving"; skip all three scans if absent
+    if 'saving' not in text_lower:
+        return "little"
     
     # Try to extract amount first
-    amount = extract_account_amount(text_lower, 'saving')
+    amount = extract_account_amount(text_lower, 'saving', text_lower)
     
     if amount is not None:
         if amount == 0:
@@ -140,26 +362,24 @@ def classify_savings_level(text: str) -> str:
             return "rich"
     
     # Pattern matching for explicit mentions
-    if re.search(r'saving[s]?[:\s]*(none|no|zero|nil|\b0\b)', text_lower):
-        return "none"
-    elif re.search(r'saving[s]?[:\s]*(little|small|minimal|low)', text_lower):
-        return "little"
-    elif re.search(r'saving[s]?[:\s]*(quite\s+rich|very\s+good|substantial|significant)', text_lower):
-        return "quite rich"
-    elif re.search(r'saving[s]?[:\s]*(rich|high|excellent|strong)', text_lower):
-        return "rich"
-    elif re.search(r'saving[s]?[:\s]*(moderate|average|medium|fair)', text_lower):
-        return "moderate"
+    level = _best_group(_SAVINGS_LEVEL_RE, text_lower)
+    if level is not None:
+        return _SAVINGS_LEVELS[level]
     
     # Default
     return "little"
 
-def classify_checking_level(text: str) -> str:
+def classify_checking_level(text: str, text_lower: Optional[str] = None) -> str:
     """Classify checking account: none, little, moderate, rich"""
-    text_lower = text.lower()
+    if text_lower is None:
+        text_lower = text.lower()
+    
+    # Every checking pattern starts with "checking"; skip all three scans if absent
+    if 'checking' not in text_lower:
+        return "little"
     
     # Try to extract amount
-    amount = extract_account_amount(text_lower, 'checking')
+    amount = extract_account_amount(text_lower, 'checking', text_lower)
     
     if amount is not None:
         if amount == 0:
@@ -172,29 +392,24 @@ def classify_checking_level(text: str) -> str:
             return "rich"
     
     # Pattern matching
-    if re.search(r'checking[:\s]*(none|no|zero|nil|\b0\b)', text_lower):
-        return "none"
-    elif re.search(r'checking[:\s]*(little|small|minimal|low)', text_lower):
-        return "little"
-    elif re.search(r'checking[:\s]*(rich|high|substantial|significant)', text_lower):
-        return "rich"
-    elif re.search(r'checking[:\s]*(moderate|average|medium|fair)', text_lower):
-        return "moderate"
+    level = _best_group(_CHECKING_LEVEL_RE, text_lower)
+    if level is not None:
+        return _CHECKING_LEVELS[level]
     
     # Default
     return "little"
 
-def extract_credit_amount(text: str) -> Optional[float]:
+def extract_credit_amount(
+    text: str,
+    text_lower: Optional[str] = None,
+    hints: Optional[AbstractSet[str]] = None
+) -> Optional[float]:
     """Extract credit/loan amount"""
-    patterns = [
-        r'(?:loan|credit)\s*(?:amount|sum)?[:\s]*(?:rs\.?|₹|inr|\$)?\s*(\d+(?:,\d{3})*(?:\.\d{2})?)',
-        r'(?:amount|sum)[:\s]*(?:rs\.?|₹|inr|\$)?\s*(\d+(?:,\d{3})*(?:\.\d{2})?)',
-        r'(?:rs\.?|₹|inr|\$)\s*(\d+(?:,\d{3})*(?:\.\d{2})?)',
-        r'principal[:\s]*(?:rs\.?|₹|inr|\$)?\s*(\d+(?:,\d{3})*(?:\.\d{2})?)'
-    ]
+    if text_lower is None:
+        text_lower = text.lower()
     
-    for pattern in patterns:
-        match = re.search(pattern, text.lower())
+    for pattern in _CREDIT_AMOUNT_PATTERNS:
+        match = _search(pattern, text_lower, hints)
         if match:
             amount_str = match.group(1).replace(',', '')
             amount = float(amount_str)
@@ -203,35 +418,26 @@ def extract_credit_amount(text: str) -> Optional[float]:
     
     return None
 
-def extract_duration_months(text: str) -> Optional[int]:
+def extract_duration_months(
+    text: str,
+    text_lower: Optional[str] = None,
+    hints: Optional[AbstractSet[str]] = None
+) -> Optional[int]:
     """Extract loan duration in months"""
+    if text_lower is None:
+        text_lower = text.lower()
     
     # Month patterns
-    month_patterns = [
-        r'duration[:\s]*(\d+)\s*months?',
-        r'tenure[:\s]*(\d+)\s*months?',
-        r'period[:\s]*(\d+)\s*months?',
-        r'term[:\s]*(\d+)\s*months?',
-        r'(\d+)\s*months?\s*(?:loan|tenure|period|term)',
-    ]
-    
-    for pattern in month_patterns:
-        match = re.search(pattern, text.lower())
+    for pattern in _DURATION_MONTH_PATTERNS:
+        match = _search(pattern, text_lower, hints)
         if match:
             months = int(match.group(1))
             if 1 <= months <= 120:  # Reasonable range
                 return months
     
     # Year patterns (convert to months)
-    year_patterns = [
-        r'duration[:\s]*(\d+)\s*years?',
-        r'tenure[:\s]*(\d+)\s*years?',
-        r'period[:\s]*(\d+)\s*years?',
-        r'term[:\s]*(\d+)\s*years?',
-    ]
-    
-    for pattern in year_patterns:
-        match = re.search(pattern, text.lower())
+    for pattern in _DURATION_YEAR_PATTERNS:
+        match = _search(pattern, text_lower, hints)
         if match:
             years = int(match.group(1))
             if 1 <= years <= 10:
@@ -239,53 +445,65 @@ def extract_duration_months(text: str) -> Optional[int]:
     
     return None
 
-def classify_loan_purpose(text: str) -> str:
+def classify_loan_purpose(text: str, text_lower: Optional[str] = None) -> str:
     """Classify loan purpose"""
-    text_lower = text.lower()
-    
-    purposes = {
-        "business": ['business', 'enterprise', 'startup', 'commercial', 'shop', 'office'],
-        "car": ['car', 'vehicle', 'automobile', 'auto', 'bike', 'motorcycle'],
-        "domestic appliances": ['appliance', 'refrigerator', 'fridge', 'washing machine', 'microwave', 'ac', 'air conditioner'],
-        "education": ['education', 'study', 'course', 'tuition', 'school', 'college', 'university', 'training'],
-        "furniture/equipment": ['furniture', 'equipment', 'furnishing', 'sofa', 'bed', 'table'],
-        "radio/TV": ['radio', 'tv', 'television', 'electronics', 'audio', 'video'],
-        "repairs": ['repair', 'renovation', 'maintenance', 'fix', 'remodel'],
-    }
+    if text_lower is None:
+        text_lower = text.lower()
     
     # Check purpose field explicitly
-    purpose_match = re.search(r'purpose[:\s]*([a-zA-Z\s/]+)', text_lower)
+    purpose_match = _PURPOSE_FIELD_RE.search(text_lower)
     if purpose_match:
         purpose_text = purpose_match.group(1).strip()
-        for purpose, keywords in purposes.items():
-            for keyword in keywords:
-                if keyword in purpose_text:
-                    return purpose
+        purpose = _best_keyword_category(_PURPOSE_AUTOMATON, _PURPOSE_KEYWORDS, purpose_text)
+        if purpose:
+            return purpose
     
     # Check entire text
-    for purpose, keywords in purposes.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                return purpose
+    purpose = _best_keyword_category(_PURPOSE_AUTOMATON, _PURPOSE_KEYWORDS, text_lower)
+    if purpose:
+        return purpose
     
     # Default
     return "vacation/others"
 
-def extract_account_amount(text: str, account_type: str) -> Optional[float]:
+def extract_account_amount(
+    text: str,
+    account_type: str,
+    text_lower: Optional[str] = None
+) -> Optional[float]:
     """Helper to extract account balance amounts"""
-    patterns = [
-        rf'{account_type}[:\s]*(?:balance|account)?[:\s]*(?:rs\.?|₹|inr|\$)?\s*(\d+(?:,\d{3})*(?:\.\d{2})?)',
-        rf'{account_type}[:\s]*(?:a/c|acc)[:\s]*(?:rs\.?|₹|inr|\$)?\s*(\d+(?:,\d{3})*(?:\.\d{2})?)',
-    ]
+    if text_lower is None:
+        text_lower = text.lower()
     
-    for pattern in patterns:
-        match = re.search(pattern, text.lower())
+    for pattern in _account_amount_patterns(account_type):
+        match = pattern.search(text_lower)
         if match:
             amount_str = match.group(1).replace(',', '')
             return float(amount_str)
     
     return None
 
+def _extract_fields(text: str) -> Dict[str, Any]:
+    """Run every extractor over the document text"""
+    # Lowercase once; every extractor matches against this copy
+    text_lower = text.lower()
+    
+    # One pass to find which hint words occur, so patterns that can't
+    # match are skipped instead of scanning the whole text
+    hints = _find_hints(text_lower)
+    
+    return {
+        "age": extract_age(text, text_lower, hints),
+        "gender": extract_gender(text, text_lower, hints),
+        "job": classify_job_category(text, text_lower, hints),
+        "housing": classify_housing_type(text, text_lower, hints),
+        "saving_accounts": classify_savings_level(text, text_lower),
+        "checking_account": classify_checking_level(text, text_lower),
+        "credit_amount": extract_credit_amount(text, text_lower, hints),
+        "duration": extract_duration_months(text, text_lower, hints),
+        "purpose": classify_loan_purpose(text, text_lower)
+    }
+
 def parse_credit_fields(text: str) -> Dict[str, Any]:
     """
     Main function: Extract all credit risk fields from document text
@@ -298,30 +516,48 @@ def parse_credit_fields(text: str) -> Dict[str, Any]:
     """
     print("[Parser] Starting field extraction from document text")
     
-    fields = {
-        "age": extract_age(text),
-        "gender": extract_gender(text),
-        "job": classify_job_category(text),
-        "housing": classify_housing_type(text),
-        "saving_accounts": classify_savings_level(text),
-        "checking_account": classify_checking_level(text),
-        "credit_amount": extract_credit_amount(text),
-        "duration": extract_duration_months(text),
-        "purpose": classify_loan_purpose(text)
-    }
+    text_sha256 = hashlib.sha256(text.encode()).hexdigest()
     
-    # Log extracted fields
-    for field, value in fields.items():
-        status = "✓" if value is not None else "✗"
-        print(f"[Parser] {status} {field}: {value}")
+    with _parse_cache_lock:
+        cached = _PARSE_CACHE.get(text_sha256)
+    
+    if cached is not None:
+        print("[Parser] Same text parsed before; reusing fields")
+        # Callers annotate the dict, so hand out a copy
+        fields = dict(cached)
+    else:
+        fields = _extract_fields(text)
+        with _parse_cache_lock:
+            if len(_PARSE_CACHE) >= _PARSE_CACHE_MAX:
+                del _PARSE_CACHE[next(iter(_PARSE_CACHE))]
+            _PARSE_CACHE[text_sha256] = dict(fields)
+    
+    # Log extracted fields (one write for the whole block)
+    log_lines = [
+        f"[Parser] {'✓' if value is not None else '✗'} {field}: {value}"
+        for field, value in fields.items()
+    ]
     
     # Check for missing critical fields
     missing = [k for k, v in fields.items() if v is None]
     if missing:
-        print(f"[Parser] ⚠️  Warning: Missing fields: {missing}")
+        log_lines.append(f"[Parser] ⚠️  Warning: Missing fields: {missing}")
+    
+    print("\n".join(log_lines))
     
     return fields
 
+# Allowed values for categorical fields, in the order error messages list them
+_VALID_GENDERS = ('male', 'female')
+_VALID_JOBS = ('unemployed', 'unskilled', 'skilled', 'highly skilled')
+_VALID_HOUSING = ('free', 'rent', 'own')
+_VALID_SAVINGS = ('none', 'little', 'moderate', 'quite rich', 'rich')
+_VALID_CHECKING = ('none', 'little', 'moderate', 'rich')
+_VALID_PURPOSES = (
+    'business', 'car', 'domestic appliances', 'education',
+    'furniture/equipment', 'radio/TV', 'repairs', 'vacation/others'
+)
+
 def validate_parsed_fields(fields: Dict[str, Any]) -> tuple[bool, list]:
     """
     Validate extracted fields meet ML API requirements
@@ -338,28 +574,24 @@ def validate_parsed_fields(fields: Dict[str, Any]) -> tuple[bool, list]:
         errors.append(f"Age {fields['age']} out of valid range (18-100)")
     
     # Gender validation
-    if fields.get('gender') not in ['male', 'female']:
+    if fields.get('gender') not in _VALID_GENDERS:
         errors.append("Gender must be 'male' or 'female'")
     
     # Job validation
-    valid_jobs = ['unemployed', 'unskilled', 'skilled', 'highly skilled']
-    if fields.get('job') not in valid_jobs:
-        errors.append(f"Job '{fields.get('job')}' must be one of {valid_jobs}")
+    if fields.get('job') not in _VALID_JOBS:
+        errors.append(f"Job '{fields.get('job')}' must be one of {list(_VALID_JOBS)}")
     
     # Housing validation
-    valid_housing = ['free', 'rent', 'own']
-    if fields.get('housing') not in valid_housing:
-        errors.append(f"Housing '{fields.get('housing')}' must be one of {valid_housing}")
+    if fields.get('housing') not in _VALID_HOUSING:
+        errors.append(f"Housing '{fields.get('housing')}' must be one of {list(_VALID_HOUSING)}")
     
     # Savings validation
-    valid_savings = ['none', 'little', 'moderate', 'quite rich', 'rich']
-    if fields.get('saving_accounts') not in valid_savings:
-        errors.append(f"Saving accounts must be one of {valid_savings}")
+    if fields.get('saving_accounts') not in _VALID_SAVINGS:
+        errors.append(f"Saving accounts must be one of {list(_VALID_SAVINGS)}")
     
     # Checking validation
-    valid_checking = ['none', 'little', 'moderate', 'rich']
-    if fields.get('checking_account') not in valid_checking:
-        errors.append(f"Checking account must be one of {valid_checking}")
+    if fields.get('checking_account') not in _VALID_CHECKING:
+        errors.append(f"Checking account must be one of {list(_VALID_CHECKING)}")
     
     # Credit amount validation
     if fields.get('credit_amount') is None:
@@ -374,20 +606,17 @@ def validate_parsed_fields(fields: Dict[str, Any]) -> tuple[bool, list]:
         errors.append("Duration must be positive (in months)")
     
     # Purpose validation
-    valid_purposes = [
-        'business', 'car', 'domestic appliances', 'education',
-        'furniture/equipment', 'radio/TV', 'repairs', 'vacation/others'
-    ]
-    if fields.get('purpose') not in valid_purposes:
-        errors.append(f"Purpose must be one of {valid_purposes}")
+    if fields.get('purpose') not in _VALID_PURPOSES:
+        errors.append(f"Purpose must be one of {list(_VALID_PURPOSES)}")
     
     is_valid = len(errors) == 0
     
     if is_valid:
         print("[Parser] ✓ All fields validated successfully")
     else:
-        print(f"[Parser] ✗ Validation failed: {len(errors)} error(s)")
-        for error in errors:
-            print(f"[Parser]   - {error}")
+        print("\n".join(
+            [f"[Parser] ✗ Validation failed: {len(errors)} error(s)"] +
+            [f"[Parser]   - {error}" for error in errors]
+        ))
     
     return (is_valid, errors)
\ No newline at end of file
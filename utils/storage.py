@@ -4,10 +4,15 @@ Handles Supabase Storage operations for documents, heatmaps, and dossiers
 """
 
 import os
+import time
+import asyncio
 import hashlib
-from typing import Tuple, List, Optional
+import tempfile
+import threading
+from typing import Tuple, List, Optional, BinaryIO, Dict, Union
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+from ._supabase import get_supabase
 from fastapi import UploadFile
 
 load_dotenv()
@@ -15,7 +20,16 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SERVICE_KEY)
+supabase: Client = get_supabase()
+
+# Read size used when streaming files to/from storage (8 MB)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Signed URLs keyed by (bucket, path) -> (expires_at, url). A cached URL is
+# reused while at least half of the requested lifetime is still left on it.
+_SIGNED_URL_CACHE: Dict[Tuple[str, str], Tuple[float, str]] = {}
+_SIGNED_URL_CACHE_MAX = 10000
+_signed_url_lock = threading.Lock()
 
 async def upload_document_to_supabase(file: UploadFile, user_id: str) -> Tuple[str, str]:
     """
@@ -28,56 +42,94 @@ async def upload_document_to_supabase(file: UploadFile, user_id: str) -> Tuple[s
     Returns:
         Tuple of (document_id, storage_path)
     """
-    # Read file data
-    data = await file.read()
-    
-    # Calculate SHA256 hash
-    sha256 = hashlib.sha256(data).hexdigest()
-    
-    # Create storage path: user_id/documents/hash_filename
-    storage_path = f"{user_id}/documents/{sha256}_{file.filename}"
-    
+    # Copy the upload to a temporary file in chunks, hashing as it goes
+    # (off the event loop), then stream that file to storage
+    tmp_path = None
     try:
-        # Upload to Supabase Storage
-        supabase.storage.from_("documents").upload(
-            path=storage_path,
-            file=data,
-            file_options={"content-type": "application/pdf"}
-        )
-    except Exception as e:
-        # If file already exists, that's okay
-        if "duplicate" not in str(e).lower() and "already exists" not in str(e).lower():
-            raise Exception(f"Storage upload failed: {str(e)}")
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+            tmp_path = tmp_file.name
+            await file.seek(0)
+            sha256 = await asyncio.to_thread(_copy_and_hash, file.file, tmp_file)
+        
+        # Create storage path: user_id/documents/hash_filename
+        storage_path = f"{user_id}/documents/{sha256}_{file.filename}"
+        
+        # Upload to Supabase Storage (an existing copy is okay) and create the
+        # database entry concurrently; the client blocks, so both run in threads
+        insert_query = supabase.table("documents").insert({
+            "user_id": user_id,
+            "filename": file.filename,
+            "storage_path": storage_path,
+            "sha256": sha256,
+            "status": "processing"  # Initial status
+        })
+        with open(tmp_path, "rb") as upload_file:
+            upload_result, result = await asyncio.gather(
+                asyncio.to_thread(
+                    upload_bytes_to_storage, "documents", storage_path, upload_file, "application/pdf"
+                ),
+                asyncio.to_thread(insert_query.execute),
+                return_exceptions=True
+            )
+    finally:
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except:
+                pass
     
-    # Create database entry
-    result = supabase.table("documents").insert({
-        "user_id": user_id,
-        "filename": file.filename,
-        "storage_path": storage_path,
-        "sha256": sha256,
-        "status": "processing"  # Initial status
-    }).execute()
+    if isinstance(result, Exception):
+        raise result
     
     if not result.data:
         raise Exception("Failed to create document record")
     
+    if isinstance(upload_result, Exception):
+        # Don't leave a record pointing at a file that was never stored
+        try:
+            supabase.table("documents").delete().eq("id", result.data[0]["id"]).execute()
+        except Exception as e:
+            print(f"Warning: Failed to remove document record: {e}")
+        raise upload_result
+    
     document_id = result.data[0]["id"]
     
     return document_id, storage_path
 
+def _copy_and_hash(src: BinaryIO, dst: BinaryIO) -> str:
+    """
+    Copy src to dst in UPLOAD_CHUNK_SIZE chunks
+    
+    Returns:
+        SHA256 hex digest of the copied data
+    """
+    hasher = hashlib.sha256()
+    
+    while True:
+        chunk = src.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        dst.write(chunk)
+    
+    return hasher.hexdigest()
+
 def upload_bytes_to_storage(
     bucket: str, 
     path: str, 
-    data: bytes, 
+    data: Union[bytes, BinaryIO], 
     content_type: str = "application/octet-stream"
 ) -> str:
     """
-    Upload raw bytes to Supabase Storage
+    Upload raw bytes or a binary file to Supabase Storage
+    
+    A file object is handed to the HTTP client as the multipart body, which
+    reads it in chunks, so peak memory does not grow with the file size.
     
     Args:
         bucket: Storage bucket name
         path: Storage path
-        data: Bytes to upload
+        data: Bytes to upload, or a readable binary file positioned at the start
         content_type: MIME type
         
     Returns:
@@ -103,6 +155,9 @@ def create_signed_url_for_path(
     """
     Create a signed URL for accessing private storage
     
+    Recently issued URLs for the same object are served from an in-process
+    cache instead of asking Supabase to sign a new one.
+    
     Args:
         bucket: Storage bucket name
         path: Storage path
@@ -111,19 +166,38 @@ def create_signed_url_for_path(
     Returns:
         Signed URL string
     """
+    key = (bucket, path)
+    now = time.time()
+    
+    with _signed_url_lock:
+        cached = _SIGNED_URL_CACHE.get(key)
+    if cached and cached[0] >= now + expires / 2:
+        return cached[1]
+    
     try:
         result = supabase.storage.from_(bucket).create_signed_url(path, expires)
         
         if isinstance(result, dict) and 'signedURL' in result:
-            return result['signedURL']
+            signed_url = result['signedURL']
         elif isinstance(result, dict) and 'signed_url' in result:
-            return result['signed_url']
+            signed_url = result['signed_url']
         else:
             # Fallback to public URL if signing fails
             return f"{SUPABASE_URL}/storage/v1/object/public/{bucket}/{path}"
             
     except Exception as e:
         raise Exception(f"Failed to create signed URL: {str(e)}")
+    
+    with _signed_url_lock:
+        if len(_SIGNED_URL_CACHE) >= _SIGNED_URL_CACHE_MAX:
+            # Drop expired entries, then the oldest if still full
+            for k in [k for k, (exp, _) in _SIGNED_URL_CACHE.items() if exp <= now]:
+                del _SIGNED_URL_CACHE[k]
+            if len(_SIGNED_URL_CACHE) >= _SIGNED_URL_CACHE_MAX:
+                del _SIGNED_URL_CACHE[next(iter(_SIGNED_URL_CACHE))]
+        _SIGNED_URL_CACHE[key] = (now + expires, signed_url)
+    
+    return signed_url
 
 def download_from_storage(bucket: str, path: str) -> bytes:
     """
@@ -142,22 +216,33 @@ def download_from_storage(bucket: str, path: str) -> bytes:
     except Exception as e:
         raise Exception(f"Storage download failed: {str(e)}")
 
-def remove_storage_paths(bucket: str, paths: List[str]) -> None:
+def remove_storage_paths(bucket: str, paths: List[str]) -> bool:
     """
     Remove multiple files from storage
     
+    Cached signed URLs for the paths are dropped as well.
+    
     Args:
         bucket: Storage bucket name
         paths: List of storage paths to remove
+        
+    Returns:
+        False if the storage request failed, True otherwise
     """
     if not paths:
-        return
+        return True
+    
+    with _signed_url_lock:
+        for path in paths:
+            _SIGNED_URL_CACHE.pop((bucket, path), None)
     
     try:
         supabase.storage.from_(bucket).remove(paths)
+        return True
     except Exception as e:
         # Log but don't fail - files might already be deleted
         print(f"Warning: Failed to remove some files from {bucket}: {str(e)}")
+        return False
 
 def get_storage_path_for_document(document_id: str) -> Optional[str]:
     """